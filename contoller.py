@@ -2,10 +2,22 @@ import cv2
 import mediapipe as mp
 import pyautogui
 import math
+import time
+import numpy as np
+from gestures import GestureEngine, ANY
+from hysteresis import Hysteresis
+from handroi import HandROITracker, landmarks_xyz
+from inputs import InputState, ActuationWorker
+from labels import draw_label
 
 # --- System Setup ---
 pyautogui.FAILSAFE = False
 pyautogui.PAUSE = 0 
+# Only key-down/key-up transitions are sent, not the full WASD state every frame,
+# and pyautogui runs on the actuation thread instead of inside the frame loop
+actuator = ActuationWorker().start()
+inputs = InputState(actuator, key=(pyautogui.keyDown, pyautogui.keyUp),
+                    mouse=(lambda b: pyautogui.mouseDown(button=b), lambda b: pyautogui.mouseUp(button=b)))
 mp_hands = mp.solutions.hands
 hands = mp_hands.Hands(max_num_hands=2, min_detection_confidence=0.75, model_complexity=1)
 
@@ -17,73 +29,88 @@ cap.set(cv2.CAP_PROP_FRAME_HEIGHT, H)
 # Settings
 SENSITIVITY = 0.5 
 DEADZONE = 60
+RELEASE = 15      # A WASD key lets go only this many px back inside the deadzone
+HAND_ROI = False  # Infer on a crop around the hands instead of the full frame
 prev_rx = 0 
 
+# Left hand offset from the movement center (px) -> WASD, hand height -> sprint
+movement = Hysteresis(["dx", "dy", "y"], {
+    "w": {"axis": "dy", "below": -DEADZONE, "release": -DEADZONE + RELEASE},
+    "s": {"axis": "dy", "above": DEADZONE, "release": DEADZONE - RELEASE},
+    "a": {"axis": "dx", "below": -DEADZONE, "release": -DEADZONE + RELEASE},
+    "d": {"axis": "dx", "above": DEADZONE, "release": DEADZONE - RELEASE},
+    "shift": {"axis": "y", "below": 150, "release": 170},   # Hand very high
+})
+
 print("1: RACING | 2: SHOOTING | 3: FLYING | 4: SPORTS")
 genre = input("Select Genre: ")
 
-def get_fingers(lms, hand_label):
-    # Returns [Thumb, Index, Middle, Ring, Pinky]
-    fingers = []
-    
-    # Thumb Logic (Different for Left/Right hand in Mediapipe)
-    if hand_label == "Left":
-        fingers.append(1 if lms[4].x > lms[3].x else 0)
-    else:
-        fingers.append(1 if lms[4].x < lms[3].x else 0)
-        
-    # Other 4 fingers
-    for tip, pip in [(8, 6), (12, 10), (16, 14), (20, 18)]:
-        fingers.append(1 if lms[tip].y < lms[pip].y else 0)
-    return fingers
+# --- ROI Hand Tracking (handroi.py) ---
+# Hands on a padded crop around last frame's hands, mapped back to full-frame coordinates
+tracker = HandROITracker(write_back=True) if HAND_ROI else None
+
+def hand_labels(results):
+    # (n,) handedness labels; the (n, 21, 3) landmarks come from landmarks_xyz / the tracker
+    return np.array([c.classification[0].label for c in results.multi_handedness or []])
+
+# --- Gesture Table ---
+# [Thumb, Index, Middle, Ring, Pinky]; "up" counts fingers excluding thumb
+gestures = GestureEngine({
+    "JUMP":     {"up": (4, 4)},                  # 4 fingers up
+    "INTERACT": {"fingers": [1, 0, 0, 0, 0]},    # Thumb only
+    "SHOOT":    {"fingers": [ANY, 1, 1, 0, 0]},  # Index + Middle
+    "RELOAD":   {"up": (3, 3)},                  # 3 fingers up
+    "SCOPE":    {"fingers": [0, 0, 0, 0, 0]},    # Fist
+})
+JUMP, INTERACT, SHOOT, RELOAD, SCOPE = (gestures.index[n] for n in ("JUMP", "INTERACT", "SHOOT", "RELOAD", "SCOPE"))
+# Gestures active last frame per screen half: taps fire once, on the frame a gesture starts
+was_active = {"left": np.zeros(len(gestures.names), dtype=bool), "right": np.zeros(len(gestures.names), dtype=bool)}
 
 while cap.isOpened():
     success, frame = cap.read()
+    t = time.perf_counter()     # Capture time: gesture and WASD timers run on camera time
     if not success: break
     frame = cv2.flip(frame, 1)
-    results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    # One landmark conversion per frame (the ROI tracker already returns the array)
+    if tracker: results, xyz = tracker.process(frame, hands)
+    else:
+        results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        xyz = landmarks_xyz(results)
     
     # UI Anchors
     cv2.circle(frame, (300, 350), DEADZONE, (255, 255, 255), 1) # Movement Center
     cv2.circle(frame, (980, 350), 30, (0, 0, 255), 2)           # Aiming Center
     
+    now_active = {side: np.zeros_like(g) for side, g in was_active.items()}
     if results.multi_hand_landmarks:
+        labels = hand_labels(results)
+        # Every gesture for every hand in one pass, plus centers
+        active, _ = gestures.evaluate(xyz, labels == "Left", t)
+        centers = (xyz[:, 9, :2] * (W, H)).astype(int)
+        
         for i, hand_lms in enumerate(results.multi_hand_landmarks):
-            lbl = results.multi_handedness[i].classification[0].label
-            lms = hand_lms.landmark
-            cx, cy = int(lms[9].x * W), int(lms[9].y * H)
-            
-            # Get finger states: [Thumb, Index, Middle, Ring, Pinky]
-            f = get_fingers(lms, lbl)
-            up_count = sum(f[1:]) # Count excluding thumb
+            cx, cy = centers[i].tolist()
+            g = active[i]
+            side = "left" if cx < W // 2 else "right"
+            started = g & ~was_active[side]
+            now_active[side] |= g
 
             # --- LEFT HAND: KEYBOARD (WASD + UTILITY) ---
-            if cx < W // 2:
+            if side == "left":
                 lx, ly = 300, 350
                 dx, dy = cx - lx, cy - ly
                 
-                # WASD Movement
-                # Forward/Back
-                if dy < -DEADZONE: pyautogui.keyDown('w'); pyautogui.keyUp('s')
-                elif dy > DEADZONE: pyautogui.keyDown('s'); pyautogui.keyUp('w')
-                else: pyautogui.keyUp('w'); pyautogui.keyUp('s')
-                
-                # Left/Right
-                if dx < -DEADZONE: pyautogui.keyDown('a'); pyautogui.keyUp('d')
-                elif dx > DEADZONE: pyautogui.keyDown('d'); pyautogui.keyUp('a')
-                else: pyautogui.keyUp('a'); pyautogui.keyUp('d')
-
-                # Sprint (Shift) - Hand very high
-                if cy < 150: pyautogui.keyDown('shift')
-                else: pyautogui.keyUp('shift')
+                # WASD Movement (Forward/Back, Left/Right) + Sprint (Shift) - Hand very high
+                for key, held in zip(movement.names, movement.update((dx, dy, cy), t)):
+                    inputs.set(key, held)
 
                 # Jump (4 fingers up)
-                if up_count == 4: pyautogui.press('space')
+                if started[JUMP]: inputs.tap('space')
                 
                 # Interact (Thumb only)
-                if f[0] == 1 and up_count == 0: 
-                    pyautogui.press('e')
-                    cv2.putText(frame, "INTERACT (E)", (cx, cy-50), 1, 2, (255, 255, 0), 2)
+                if g[INTERACT]: 
+                    if started[INTERACT]: inputs.tap('e')
+                    draw_label(frame, "INTERACT (E)", (cx, cy-50), 1, 2, (255, 255, 0), 2)
 
             # --- RIGHT HAND: MOUSE (LOOK + COMBAT) ---
             else:
@@ -92,36 +119,36 @@ while cap.isOpened():
                 
                 # Aiming
                 if abs(rdx) > 20 or abs(rdy) > 20:
-                    pyautogui.moveRel(rdx * SENSITIVITY, rdy * SENSITIVITY)
+                    inputs.call(pyautogui.moveRel, rdx * SENSITIVITY, rdy * SENSITIVITY)
                 
                 # Shoot (2 Fingers: Index + Middle)
-                if up_count == 2 and f[1] == 1 and f[2] == 1:
-                    pyautogui.click()
-                    cv2.putText(frame, "SHOOT", (cx, cy-80), 1, 2, (0, 0, 255), 3)
+                if g[SHOOT]:
+                    if started[SHOOT]: inputs.tap('left', "mouse")
+                    draw_label(frame, "SHOOT", (cx, cy-80), 1, 2, (0, 0, 255), 3)
                 
                 # Reload (3 Fingers: Index + Middle + Ring)
-                elif up_count == 3:
-                    pyautogui.press('r')
-                    cv2.putText(frame, "RELOAD", (cx, cy-80), 1, 2, (0, 255, 0), 2)
+                elif g[RELOAD]:
+                    if started[RELOAD]: inputs.tap('r')
+                    draw_label(frame, "RELOAD", (cx, cy-80), 1, 2, (0, 255, 0), 2)
                 
                 # Scope (Fist)
-                if up_count == 0 and f[0] == 0:
-                    pyautogui.mouseDown(button='right')
-                else:
-                    pyautogui.mouseUp(button='right')
+                inputs.set('right', g[SCOPE], "mouse")
 
             mp.solutions.drawing_utils.draw_landmarks(frame, hand_lms, mp_hands.HAND_CONNECTIONS)
+    was_active = now_active
 
     # --- THE ALL-IN-ONE HUD ---
     cv2.rectangle(frame, (20, 20), (500, 200), (0, 0, 0), -1)
-    cv2.putText(frame, f"UNIVERSAL CTRL: {genre}", (30, 50), 1, 1.5, (0, 255, 0), 2)
-    cv2.putText(frame, "L-HAND: WASD Movement | Thumb: E", (30, 85), 1, 1, (255, 255, 255), 1)
-    cv2.putText(frame, "R-HAND: Aim | 2-Fing: Shoot | 3-Fing: R", (30, 115), 1, 1, (255, 255, 255), 1)
-    cv2.putText(frame, "FIST: Scope (Right Click)", (30, 145), 1, 1, (255, 255, 255), 1)
-    cv2.putText(frame, "SPRINT: Move Hand Top | JUMP: 4-Fingers", (30, 175), 1, 1, (255, 255, 255), 1)
+    draw_label(frame, f"UNIVERSAL CTRL: {genre}", (30, 50), 1, 1.5, (0, 255, 0), 2)
+    draw_label(frame, "L-HAND: WASD Movement | Thumb: E", (30, 85), 1, 1, (255, 255, 255), 1)
+    draw_label(frame, "R-HAND: Aim | 2-Fing: Shoot | 3-Fing: R", (30, 115), 1, 1, (255, 255, 255), 1)
+    draw_label(frame, "FIST: Scope (Right Click)", (30, 145), 1, 1, (255, 255, 255), 1)
+    draw_label(frame, "SPRINT: Move Hand Top | JUMP: 4-Fingers", (30, 175), 1, 1, (255, 255, 255), 1)
 
     cv2.imshow("Universal Omni-Controller v4.5", frame)
     if cv2.waitKey(1) & 0xFF == 27: break
 
+inputs.release_all()
+actuator.stop()
 cap.release()
 cv2.destroyAllWindows()
\ No newline at end of file
@@ -1,24 +1,53 @@
 import cv2
 import mediapipe as mp
 import time
+import queue
 import threading
+import multiprocessing
+import numpy as np
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+from mediapipe.framework.formats import landmark_pb2, classification_pb2
 from pynput.keyboard import Key, Controller
-
-# --- Initialize Mac Keyboard Controller ---
-keyboard = Controller()
+from gestures import GestureEngine, ANY
+from hysteresis import Hysteresis
+from handroi import HandROITracker
+from inputs import InputState, ActuationWorker
+from labels import draw_label
 
 # --- Configuration ---
 SENSITIVITY = 0.10  # Lower = more sensitive
 DEADZONE = 0.02     # Range where steering stays centered
-current_key = None  # Tracks if 'a' or 'd' is currently held
+RELEASE = 0.005     # Steering lets go only this far back inside the deadzone
+PARALLEL_MODELS = False  # Run Pose and Hands at the same time in two worker processes
+HAND_ROI = False  # Serial mode: infer hands on a crop seeded from last frame's pose wrists
+
+# Peace sign (Index + Middle up, Ring + Pinky down) held for 3s quits
+gestures = GestureEngine({"QUIT": {"fingers": [ANY, 1, 1, 0, 0], "dwell": 3.0}})
+QUIT = gestures.index["QUIT"]
+
+# neck = nose x - shoulder center x, lift = left shoulder y - left wrist y (normalized)
+posture = Hysteresis(["neck", "lift"], {
+    "a": {"axis": "neck", "below": -DEADZONE, "release": -DEADZONE + RELEASE},
+    "d": {"axis": "neck", "above": DEADZONE, "release": DEADZONE - RELEASE},
+    "s": {"axis": "lift", "above": 0.0, "release": -0.02},   # Wrist above shoulder
+})
 
 # --- Threaded Camera Class ---
+# Publishes (seq, capture time in perf_counter_ns, frame) from a ring of
+# preallocated frames. A frame stays valid for (slots - 1) further captures.
 class WebCamStream:
-    def __init__(self, src=0):
+    def __init__(self, src=0, slots=3):
         self.stream = cv2.VideoCapture(src)
         self.stream.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
         self.stream.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        (self.grabbed, self.frame) = self.stream.read()
+        self.buffers = [np.empty((480, 640, 3), dtype=np.uint8) for _ in range(slots)]
+        self.latest = (0, 0, None)
+        self.new_frame = threading.Condition()
+        (self.grabbed, frame) = self.stream.read(self.buffers[0])
+        if self.grabbed:
+            self.buffers[0] = frame
+            self.latest = (1, time.perf_counter_ns(), frame)
         self.stopped = False
 
     def start(self):
@@ -27,127 +56,280 @@ class WebCamStream:
 
     def update(self):
         while not self.stopped:
-            (self.grabbed, self.frame) = self.stream.read()
+            seq = self.latest[0]
+            slot = (seq + 1) % len(self.buffers)
+            (self.grabbed, frame) = self.stream.read(self.buffers[slot])
+            ts = time.perf_counter_ns()
+            if not self.grabbed:
+                time.sleep(0.005)
+                continue
+            self.buffers[slot] = frame
+            self.latest = (seq + 1, ts, frame)
+            with self.new_frame:
+                self.new_frame.notify_all()
 
     def read(self):
-        return self.frame
+        return self.latest[2]
+
+    def read_new(self, after_seq, timeout=None):
+        # Blocks until a frame newer than after_seq arrives; (after_seq, 0, None) on timeout
+        latest = self.latest
+        if latest[0] > after_seq:
+            return latest
+        with self.new_frame:
+            self.new_frame.wait_for(lambda: self.latest[0] > after_seq or self.stopped, timeout)
+        latest = self.latest
+        if latest[0] > after_seq:
+            return latest
+        return (after_seq, 0, None)
 
     def stop(self):
         self.stopped = True
+        with self.new_frame:
+            self.new_frame.notify_all()
         self.stream.release()
 
 # --- Setup MediaPipe ---
 mp_pose = mp.solutions.pose
 mp_hands = mp.solutions.hands
-pose = mp_pose.Pose(model_complexity=0, min_detection_confidence=0.5)
-hands = mp_hands.Hands(model_complexity=0, min_detection_confidence=0.7)
 mp_drawing = mp.solutions.drawing_utils
 
-# Start Stream
-vs = WebCamStream(src=0).start()
-time.sleep(2.0)
+def make_pose():
+    return mp_pose.Pose(model_complexity=0, min_detection_confidence=0.5)
+
+def make_hands():
+    return mp_hands.Hands(model_complexity=0, min_detection_confidence=0.7)
+
+# --- Parallel Inference (PARALLEL_MODELS) ---
+# Each model lives in its own process. Frames go through shared memory
+# (one copy, no pickling); only the small landmark protobufs come back.
+# A worker that does not start or stops answering -> sequential inference.
+READY = -1              # 'seq' of the message a worker sends once its model is built
+READY_TIMEOUT = 60.0    # Spawned workers import mediapipe and build a graph first
+RESULT_TIMEOUT = 5.0
+
+def model_worker(kind, shm_name, shape, slots, jobs, results):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray((slots,) + shape, dtype=np.uint8, buffer=shm.buf)
+    model = make_pose() if kind == "pose" else make_hands()
+    results.put((kind, READY, None))
+    while True:
+        job = jobs.get()
+        if job is None: break
+        seq, slot = job
+        res = model.process(frames[slot])
+        if kind == "pose":
+            out = res.pose_landmarks.SerializeToString() if res.pose_landmarks else None
+        else:
+            out = ([lms.SerializeToString() for lms in res.multi_hand_landmarks or []],
+                   [cls.SerializeToString() for cls in res.multi_handedness or []])
+        results.put((kind, seq, out))
+    model.close()
+    del frames
+    shm.close()
+
+class ParallelModels:
+    def __init__(self, shape, slots=2):
+        ctx = multiprocessing.get_context("spawn")
+        self.shape, self.slots = shape, slots
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * int(np.prod(shape)))
+        self.frames = np.ndarray((slots,) + shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.jobs = {"pose": ctx.Queue(), "hands": ctx.Queue()}
+        self.results = ctx.Queue()
+        self.workers = [ctx.Process(target=model_worker, daemon=True,
+                                    args=(kind, self.shm.name, shape, slots, q, self.results))
+                        for kind, q in self.jobs.items()]
+        for p in self.workers: p.start()
+
+    def alive(self):
+        return all(p.is_alive() for p in self.workers)
+
+    def _get(self, deadline):
+        # Next result, or None once the deadline passes or a worker has died
+        while True:
+            try:
+                return self.results.get(timeout=0.5)
+            except queue.Empty:
+                if time.perf_counter() > deadline or not self.alive():
+                    return None
+
+    def wait_ready(self, timeout=READY_TIMEOUT):
+        """Blocks until every worker has built its model. False if one died or timed out."""
+        ready = set()
+        deadline = time.perf_counter() + timeout
+        while len(ready) < len(self.workers):
+            msg = self._get(deadline)
+            if msg is None:
+                return False
+            ready.add(msg[0])
+        return True
+
+    def process(self, seq, rgb_frame):
+        # Publish the frame, run both models at once, join the answers on seq.
+        # Returns None if a worker died or did not answer in time.
+        slot = seq % self.slots
+        if rgb_frame.shape != self.shape:
+            rgb_frame = cv2.resize(rgb_frame, (self.shape[1], self.shape[0]))
+        self.frames[slot] = rgb_frame
+        for q in self.jobs.values(): q.put((seq, slot))
+
+        out = {}
+        deadline = time.perf_counter() + RESULT_TIMEOUT
+        while len(out) < 2:
+            msg = self._get(deadline)
+            if msg is None:
+                return None
+            kind, res_seq, res = msg
+            if res_seq == seq: out[kind] = res  # Drop late answers for older frames
+
+        pose_lms = landmark_pb2.NormalizedLandmarkList.FromString(out["pose"]) if out["pose"] else None
+        hand_lms, handedness = out["hands"]
+        pose_results = SimpleNamespace(pose_landmarks=pose_lms)
+        hand_results = SimpleNamespace(
+            multi_hand_landmarks=[landmark_pb2.NormalizedLandmarkList.FromString(b) for b in hand_lms] or None,
+            multi_handedness=[classification_pb2.ClassificationList.FromString(b) for b in handedness] or None)
+        return pose_results, hand_results
 
-prev_frame_time = 0
-quit_timer_start = None
+    def close(self):
+        for q in self.jobs.values(): q.put(None)
+        for p in self.workers:
+            p.join(timeout=2.0)
+            if p.is_alive(): p.terminate()  # Hung worker
+        del self.frames
+        self.shm.close()
+        self.shm.unlink()
 
-while True:
-    frame = vs.read()
-    if frame is None: continue
+def main():
+    # --- Initialize Mac Keyboard Controller ---
+    keyboard = Controller()
+    # Sends only press/release transitions, from the actuation thread
+    actuator = ActuationWorker().start()
+    inputs = InputState(actuator, key=(keyboard.press, keyboard.release))
 
-    # 1. Calculate FPS
-    new_frame_time = time.time()
-    fps = 1 / (max(new_frame_time - prev_frame_time, 0.001))
-    prev_frame_time = new_frame_time
+    # Start Stream
+    vs = WebCamStream(src=0).start()
+    time.sleep(2.0)
 
-    # 2. Prep frame
-    frame = cv2.flip(frame, 1)
-    h, w, _ = frame.shape
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    models = ParallelModels(vs.buffers[0].shape) if PARALLEL_MODELS else None
+    if models is not None and not models.wait_ready():
+        print(">>> MODEL WORKERS FAILED TO START, USING SEQUENTIAL INFERENCE")
+        models.close()
+        models = None
+    pose = hands = tracker = None
+
+    prev_frame_time = 0
+    frame_seq = 0
+
+    while True:
+        # Only process frames we have not seen yet
+        frame_seq, frame_ts, frame = vs.read_new(frame_seq, timeout=0.5)
+        if frame is None: continue
+
+        # 1. Calculate FPS
+        new_frame_time = time.time()
+        fps = 1 / (max(new_frame_time - prev_frame_time, 0.001))
+        prev_frame_time = new_frame_time
+
+        # 2. Prep frame
+        frame = cv2.flip(frame, 1)
+        h, w, _ = frame.shape
+        t = frame_ts / 1e9      # Capture time: gesture dwell and steering hold run on camera time
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     
-    # Process models
-    pose_results = pose.process(rgb_frame)
-    hand_results = hands.process(rgb_frame)
-
-    active_inputs = []
-    quit_gesture_active = False
-
-    # --- HAND LOGIC: Peace Sign to Quit ---
-    if hand_results.multi_hand_landmarks:
-        for hand_lms in hand_results.multi_hand_landmarks:
-            index_up = hand_lms.landmark[8].y < hand_lms.landmark[6].y
-            middle_up = hand_lms.landmark[12].y < hand_lms.landmark[10].y
-            ring_down = hand_lms.landmark[16].y > hand_lms.landmark[14].y
-            pinky_down = hand_lms.landmark[20].y > hand_lms.landmark[18].y
-
-            if index_up and middle_up and ring_down and pinky_down:
-                quit_gesture_active = True
-                mp_drawing.draw_landmarks(frame, hand_lms, mp_hands.HAND_CONNECTIONS)
-
-    # --- QUIT TIMER ---
-    if quit_gesture_active:
-        if quit_timer_start is None:
-            quit_timer_start = time.time()
-        elapsed = time.time() - quit_timer_start
-        active_inputs.append(f"QUITTING IN {max(0, 3 - int(elapsed))}s")
-        if elapsed >= 3:
-            break
-    else:
-        quit_timer_start = None
-
-    # --- POSE LOGIC (Steering & Braking) ---
-    if pose_results.pose_landmarks and not quit_gesture_active:
-        lms = pose_results.pose_landmarks.landmark
-        nose = lms[mp_pose.PoseLandmark.NOSE]
-        l_shldr = lms[mp_pose.PoseLandmark.LEFT_SHOULDER]
-        r_shldr = lms[mp_pose.PoseLandmark.RIGHT_SHOULDER]
-        l_wrist = lms[mp_pose.PoseLandmark.LEFT_WRIST]
-
-        shldr_x = (l_shldr.x + r_shldr.x) / 2
-        diff = nose.x - shldr_x
-
-        # --- LAG-FREE STEERING ---
-        if diff < -DEADZONE:
-            if current_key != 'a':
-                keyboard.release('d')
-                keyboard.press('a')
-                current_key = 'a'
-            active_inputs.append("STEER LEFT (A)")
-        elif diff > DEADZONE:
-            if current_key != 'd':
-                keyboard.release('a')
-                keyboard.press('d')
-                current_key = 'd'
-            active_inputs.append("STEER RIGHT (D)")
+        # Process models
+        results = models.process(frame_seq, rgb_frame) if models is not None else None
+        if models is not None and results is None:
+            print(">>> MODEL WORKER STOPPED ANSWERING, SWITCHING TO SEQUENTIAL INFERENCE")
+            models.close()
+            models = None
+        if models is None and pose is None:
+            pose = make_pose()
+            hands = make_hands()
+            tracker = HandROITracker(write_back=True) if HAND_ROI else None
+
+        if results is not None:
+            pose_results, hand_results = results
+        elif tracker:
+            pose_results = pose.process(rgb_frame)
+            if pose_results.pose_landmarks:
+                # Wrist + hand points (15-22) of this frame's pose give the hand crop
+                pts = pose_results.pose_landmarks.landmark[15:23]
+                tracker.seed([p.x for p in pts], [p.y for p in pts], w, h)
+            hand_results, _ = tracker.process(frame, hands)
         else:
-            if current_key is not None:
-                keyboard.release('a')
-                keyboard.release('d')
-                current_key = None
-            active_inputs.append("STRAIGHT")
-
-        # --- BRAKE LOGIC ---
-        if l_wrist.y < l_shldr.y:
-            keyboard.press('s')
-            active_inputs.append("BRAKE (S)")
+            pose_results = pose.process(rgb_frame)
+            hand_results = hands.process(rgb_frame)
+
+        active_inputs = []
+        quit_gesture_active = False
+
+        # --- HAND LOGIC: Peace Sign to Quit ---
+        if hand_results.multi_hand_landmarks:
+            hand_list = hand_results.multi_hand_landmarks
+            # One (n, 21, 3) array, sorted left to right so dwell timers follow the same hand
+            xyz = np.array([[(lm.x, lm.y, lm.z) for lm in h.landmark] for h in hand_list], dtype=np.float32)
+            order = np.argsort(xyz[:, 0, 0], kind="stable")
+            quit_ready, held = gestures.evaluate(xyz[order], np.zeros(len(order), dtype=bool), t)
+
+            for slot in np.flatnonzero(~np.isnan(held[:, QUIT])):
+                quit_gesture_active = True
+                mp_drawing.draw_landmarks(frame, hand_list[order[slot]], mp_hands.HAND_CONNECTIONS)
         else:
-            keyboard.release('s')
+            gestures.reset()
+
+        # --- QUIT TIMER (dwell time of the QUIT gesture) ---
+        if quit_gesture_active:
+            if quit_ready[:, QUIT].any():
+                break
+            elapsed = np.nanmax(held[:, QUIT])
+            active_inputs.append(f"QUITTING IN {max(0, 3 - int(elapsed))}s")
+
+        # --- POSE LOGIC (Steering & Braking) ---
+        if pose_results.pose_landmarks and not quit_gesture_active:
+            lms = pose_results.pose_landmarks.landmark
+            nose = lms[mp_pose.PoseLandmark.NOSE]
+            l_shldr = lms[mp_pose.PoseLandmark.LEFT_SHOULDER]
+            r_shldr = lms[mp_pose.PoseLandmark.RIGHT_SHOULDER]
+            l_wrist = lms[mp_pose.PoseLandmark.LEFT_WRIST]
+
+            shldr_x = (l_shldr.x + r_shldr.x) / 2
+            diff = nose.x - shldr_x
+
+            # --- LAG-FREE STEERING + BRAKE LOGIC ---
+            for key, held in zip(posture.names, posture.update((diff, l_shldr.y - l_wrist.y), t)):
+                inputs.set(key, held)
+            if posture['a']:
+                active_inputs.append("STEER LEFT (A)")
+            elif posture['d']:
+                active_inputs.append("STEER RIGHT (D)")
+            else:
+                active_inputs.append("STRAIGHT")
+            if posture['s']:
+                active_inputs.append("BRAKE (S)")
+
+            mp_drawing.draw_landmarks(frame, pose_results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
 
-        mp_drawing.draw_landmarks(frame, pose_results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+        # --- HUD ---
+        cv2.rectangle(frame, (10, 10), (280, 160), (0, 0, 0), -1)
+        draw_label(frame, "MAC CONTROLLER", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+        for i, text in enumerate(active_inputs):
+            draw_label(frame, f"- {text}", (20, 75 + (i * 25)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
 
-    # --- HUD ---
-    cv2.rectangle(frame, (10, 10), (280, 160), (0, 0, 0), -1)
-    cv2.putText(frame, "MAC CONTROLLER", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-    for i, text in enumerate(active_inputs):
-        cv2.putText(frame, f"- {text}", (20, 75 + (i * 25)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        cv2.putText(frame, f"FPS: {int(fps)}", (w - 110, h - 18), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        # Capture age: camera timestamp -> now (includes inference + drawing)
+        age_ms = (time.perf_counter_ns() - frame_ts) / 1e6
+        cv2.putText(frame, f"AGE: {int(age_ms)}ms", (w - 130, h - 45), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
 
-    cv2.putText(frame, f"FPS: {int(fps)}", (w - 110, h - 18), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        cv2.imshow('Motion Controller HUD', frame)
+        if cv2.waitKey(1) & 0xFF == ord('q'): break
 
-    cv2.imshow('Motion Controller HUD', frame)
-    if cv2.waitKey(1) & 0xFF == ord('q'): break
+    # Cleanup
+    inputs.release_all()
+    actuator.stop()
+    vs.stop()
+    if models is not None:
+        models.close()
+    cv2.destroyAllWindows()
 
-# Cleanup
-keyboard.release('a')
-keyboard.release('d')
-keyboard.release('s')
-vs.stop()
-cv2.destroyAllWindows()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
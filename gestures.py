@@ -0,0 +1,107 @@
+import time
+import numpy as np
+
+# ==============================================================================
+#   GESTURE RULE ENGINE
+#   Shared by TITAN_ENGINE_FINAL.PY, contoller.py and controllerposture.py.
+#
+#   Gestures are declared in a table (plain dicts) and compiled ONCE into
+#   NumPy arrays. Every frame, all gestures are tested against all hands in
+#   a single vectorized pass, so adding a gesture adds a row to the arrays,
+#   not a Python branch to the frame loop.
+#
+#   Gesture spec keys (all optional):
+#     "fingers":   [Thumb, Index, Middle, Ring, Pinky] as 1 (up), 0 (down) or ANY
+#     "up":        (min, max) number of raised fingers, thumb excluded
+#     "distances": [(lm_a, lm_b, lo, hi)] landmark distance in palm lengths
+#                  (palm length = wrist (0) to middle MCP (9))
+#     "angles":    [(lm_a, lm_b, lm_c, lo, hi)] joint angle at lm_b in degrees
+#     "dwell":     seconds the rule must hold before the gesture fires
+#
+#   Example: "PINCH": {"distances": [(4, 8, 0.0, 0.25)]}
+# ==============================================================================
+
+ANY = -1
+FINGER_TIPS = [8, 12, 16, 20]   # Index, Middle, Ring, Pinky
+FINGER_PIPS = [6, 10, 14, 18]
+
+def finger_states(xyz, is_left):
+    """
+    (n, 21, 3) landmarks + (n,) bool handedness -> (n, 5) uint8
+    [Thumb, Index, Middle, Ring, Pinky]. Thumb logic is mirrored for left hands.
+    """
+    thumb = np.where(is_left, xyz[:, 4, 0] > xyz[:, 3, 0], xyz[:, 4, 0] < xyz[:, 3, 0])
+    others = xyz[:, FINGER_TIPS, 1] < xyz[:, FINGER_PIPS, 1]
+    return np.column_stack([thumb, others]).astype(np.uint8)
+
+class GestureEngine:
+    """
+    Batch evaluator for one gesture table.
+    Dwell timers are kept per hand slot (row order of the landmarks passed
+    in), so callers should pass hands in a stable order (e.g. left to right).
+    """
+    def __init__(self, table, max_hands=2):
+        self.names = list(table)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.max_hands = max_hands
+        g = len(self.names)
+
+        # Finger pattern: compare where 'care', ignore ANY
+        pattern = np.array([spec.get("fingers", [ANY] * 5) for spec in table.values()], dtype=np.int8).reshape(g, 5)
+        self.care = pattern != ANY
+        self.want = np.where(self.care, pattern, 0).astype(np.uint8)
+        self.up_min = np.array([spec.get("up", (0, 4))[0] for spec in table.values()])
+        self.up_max = np.array([spec.get("up", (0, 4))[1] for spec in table.values()])
+        self.dwell = np.array([spec.get("dwell", 0.0) for spec in table.values()])
+
+        # Distance / angle terms are flattened; 'owner' (K, G) maps each term to its gesture
+        dist = [(i, *term) for i, spec in enumerate(table.values()) for term in spec.get("distances", [])]
+        ang = [(i, *term) for i, spec in enumerate(table.values()) for term in spec.get("angles", [])]
+        self.dist = np.array(dist, dtype=np.float64).reshape(-1, 5)
+        self.ang = np.array(ang, dtype=np.float64).reshape(-1, 6)
+        self.dist_owner = np.eye(g, dtype=np.int32)[self.dist[:, 0].astype(int)]
+        self.ang_owner = np.eye(g, dtype=np.int32)[self.ang[:, 0].astype(int)]
+
+        self.since = np.full((max_hands, g), np.nan)
+
+    def reset(self):
+        self.since[:] = np.nan
+
+    def evaluate(self, xyz, is_left, t=None):
+        """
+        xyz (n, 21, 3), is_left (n,) bool -> (active, held), both (n, G):
+        'active' = rule matched for at least its dwell time,
+        'held' = seconds the rule has matched so far (NaN if not matching).
+        Extra hands beyond max_hands are ignored.
+        """
+        if t is None:
+            t = time.perf_counter()
+        n = min(len(xyz), self.max_hands)
+        xyz, is_left = xyz[:n], np.asarray(is_left)[:n]
+
+        f = finger_states(xyz, is_left)
+        up = f[:, 1:].sum(axis=1)
+        ok = ((f[:, None, :] == self.want) | ~self.care).all(axis=-1)
+        ok &= (up[:, None] >= self.up_min) & (up[:, None] <= self.up_max)
+
+        if len(self.dist):
+            palm = np.linalg.norm(xyz[:, 0] - xyz[:, 9], axis=-1)[:, None] + 1e-6
+            a, b = self.dist[:, 1].astype(int), self.dist[:, 2].astype(int)
+            d = np.linalg.norm(xyz[:, a] - xyz[:, b], axis=-1) / palm
+            bad = ~((d >= self.dist[:, 3]) & (d <= self.dist[:, 4]))
+            ok &= (bad.astype(np.int32) @ self.dist_owner) == 0
+
+        if len(self.ang):
+            a, b, c = (self.ang[:, k].astype(int) for k in (1, 2, 3))
+            v1, v2 = xyz[:, a] - xyz[:, b], xyz[:, c] - xyz[:, b]
+            cos = (v1 * v2).sum(-1) / (np.linalg.norm(v1, axis=-1) * np.linalg.norm(v2, axis=-1) + 1e-9)
+            deg = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+            bad = ~((deg >= self.ang[:, 4]) & (deg <= self.ang[:, 5]))
+            ok &= (bad.astype(np.int32) @ self.ang_owner) == 0
+
+        # Dwell: remember when each (hand slot, gesture) started matching
+        since = np.where(ok, np.where(np.isnan(self.since[:n]), t, self.since[:n]), np.nan)
+        self.since[:n] = since
+        self.since[n:] = np.nan
+        held = t - since
+        return ok & (held >= self.dwell), held
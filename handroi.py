@@ -0,0 +1,115 @@
+import cv2
+import numpy as np
+
+# ==============================================================================
+#   ROI HAND TRACKING
+#   Shared by TITAN_ENGINE_FINAL.PY, contoller.py and controllerposture.py.
+#
+#   Runs the Hands model on a padded crop around last frame's hands instead
+#   of the full 1280x720 frame. Landmarks are mapped back to full-frame
+#   normalized coordinates, so the gesture rules and the engines see the same
+#   values. When tracking is lost (or every 'redetect_every' frames, to pick
+#   up a hand entering the scene) it re-detects on a downscaled full frame.
+#
+#   Only the thread that calls process() touches the crop; reset() from any
+#   other thread just asks for a re-detect on the next frame.
+# ==============================================================================
+
+def landmarks_xyz(results):
+    """MediaPipe Hands result -> (n, 21, 3) float32 landmarks."""
+    hand_list = results.multi_hand_landmarks or []
+    return np.array([[(lm.x, lm.y, lm.z) for lm in h.landmark] for h in hand_list], dtype=np.float32).reshape(-1, 21, 3)
+
+def write_landmarks(results, xyz):
+    """Copies (n, 21, 3) landmarks back into the result's protobufs (for drawing_utils)."""
+    for hand_lms, points in zip(results.multi_hand_landmarks or [], xyz.tolist()):
+        for lm, (x, y, z) in zip(hand_lms.landmark, points):
+            lm.x, lm.y, lm.z = x, y, z
+
+class HandROITracker:
+    """
+    'write_back' also rewrites the result's landmark protobufs in full-frame
+    coordinates (callers that draw them); otherwise only the array is mapped.
+    """
+    def __init__(self, pad=0.6, redetect_scale=0.5, redetect_every=15, min_size=200, write_back=False):
+        self.pad = pad                      # Padding as a fraction of the hand box size
+        self.redetect_scale = redetect_scale
+        self.redetect_every = redetect_every
+        self.min_size = min_size            # Smallest crop side in pixels
+        self.write_back = write_back
+        self.roi = None                     # (x0, y0, x1, y1) in full-frame pixels
+        self.frames_since_detect = 0
+        self.lost = False                   # Set by reset(), applied by process()
+
+    def reset(self):
+        self.lost = True
+
+    def seed(self, xs, ys, w, h):
+        """
+        Starts tracking from external normalized points (e.g. pose wrists).
+        Call from the process() thread.
+        """
+        if self.roi is None and len(xs):
+            self.roi = self._box(min(xs) * w, min(ys) * h, max(xs) * w, max(ys) * h, w, h)
+
+    def _box(self, bx0, by0, bx1, by1, w, h):
+        # Pad around the hand box, enforce a minimum size, clamp to the frame
+        half = max(bx1 - bx0, by1 - by0) * (0.5 + self.pad)
+        half = max(half, self.min_size / 2)
+        cx, cy = (bx0 + bx1) / 2, (by0 + by1) / 2
+        return (max(0, int(cx - half)), max(0, int(cy - half)),
+                min(w, int(cx + half)), min(h, int(cy + half)))
+
+    def process(self, frame, model, scale=1.0):
+        """
+        Runs 'model' (a Hands graph) on the BGR frame; only the pixels
+        actually inferred get converted. 'scale' < 1 shrinks what the model
+        sees (normalized coordinates do not change).
+        Returns (results, xyz): the model's result and its landmarks as an
+        (n, 21, 3) array, both in full-frame coordinates.
+        """
+        if self.lost:
+            self.lost = False
+            self.roi = None
+        h, w = frame.shape[:2]
+        roi = self.roi
+
+        if roi is None or self.frames_since_detect >= self.redetect_every:
+            # Re-detection: normalized coordinates are scale invariant, no remap needed
+            fx = self.redetect_scale * scale
+            small = cv2.resize(frame, None, fx=fx, fy=fx, interpolation=cv2.INTER_AREA)
+            results = model.process(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+            xyz = landmarks_xyz(results)
+            self.frames_since_detect = 0
+        else:
+            x0, y0, x1, y1 = roi
+            crop = frame[y0:y1, x0:x1]
+            if scale < 1:
+                crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            results = model.process(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
+            xyz = landmarks_xyz(results)
+            # Crop-normalized -> full-frame-normalized, all landmarks at once
+            sx, sy = (x1 - x0) / w, (y1 - y0) / h
+            xyz *= np.array([sx, sy, sx], dtype=np.float32)
+            xyz[..., 0] += x0 / w
+            xyz[..., 1] += y0 / h
+            if self.write_back:
+                write_landmarks(results, xyz)
+            self.frames_since_detect += 1
+
+        if len(xyz) == 0:
+            self.roi = None
+            return results, xyz
+
+        pts = xyz[..., :2].reshape(-1, 2) * (w, h)
+        (bx0, by0), (bx1, by1) = pts.min(axis=0).tolist(), pts.max(axis=0).tolist()
+
+        # Keep the crop still while the hands stay well inside it;
+        # a steady crop lets MediaPipe's own tracker skip palm detection
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            mx, my = (x1 - x0) * 0.1, (y1 - y0) * 0.1
+            if bx0 > x0 + mx and by0 > y0 + my and bx1 < x1 - mx and by1 < y1 - my:
+                return results, xyz
+        self.roi = self._box(bx0, by0, bx1, by1, w, h)
+        return results, xyz
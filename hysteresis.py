@@ -0,0 +1,79 @@
+import time
+import numpy as np
+
+# ==============================================================================
+#   HYSTERESIS SWITCHES
+#   Shared by TITAN_ENGINE_FINAL.PY, contoller.py and controllerposture.py.
+#
+#   Turns continuous values (steer angle, hand height, neck deviation ...)
+#   into on/off outputs without chatter. Every switch has two thresholds:
+#   it turns ON past 'above' (or 'below') and only turns OFF again once the
+#   value is back past 'release', so landmark jitter inside that band does
+#   nothing. A switch also keeps each new state for at least 'hold' seconds.
+#   Switches on the same axis pointing opposite ways (left / right) are
+#   exclusive: one turning on turns the other off at once, hold or not.
+#
+#   Like the gesture tables, switches are declared in a table (plain dicts)
+#   and compiled ONCE into NumPy arrays; update() is one vectorized step.
+#
+#   Switch spec keys:
+#     "axis":    name of the value it watches (one of the 'axes' list)
+#     "above":   turns on when value > above ...  or
+#     "below":   turns on when value < below
+#     "release": turns off once the value is back past this (default: the on threshold)
+#     "hold":    minimum seconds in a state (default: the table's 'hold')
+#
+#   Example: "RIGHT": {"axis": "angle", "above": 8, "release": 5}
+# ==============================================================================
+
+DEFAULT_HOLD = 0.06     # About two camera frames
+
+class Hysteresis:
+    def __init__(self, axes, table, hold=DEFAULT_HOLD):
+        self.axes = list(axes)
+        self.names = list(table)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        specs = list(table.values())
+
+        self.axis = np.array([self.axes.index(spec["axis"]) for spec in specs], dtype=np.intp)
+        # Everything is stored as "turns on above": 'below' switches watch -value
+        self.sign = np.array([1.0 if "above" in spec else -1.0 for spec in specs])
+        on = np.array([spec["above"] if "above" in spec else spec["below"] for spec in specs], dtype=np.float64)
+        off = np.array([spec.get("release", o) for spec, o in zip(specs, on)], dtype=np.float64)
+        self.on, self.off = on * self.sign, off * self.sign
+        self.hold = np.array([spec.get("hold", hold) for spec in specs], dtype=np.float64)
+        # rivals[i, j]: switch i turning on forces switch j off
+        self.rivals = (self.axis[:, None] == self.axis[None, :]) & (self.sign[:, None] != self.sign[None, :])
+
+        self.state = np.zeros(len(specs), dtype=bool)
+        self.changed = np.zeros(len(specs), dtype=bool)   # Switches that flipped in the last update()
+        self.since = np.full(len(specs), -np.inf)
+
+    def reset(self):
+        self.state[:] = False
+        self.changed[:] = False
+        self.since[:] = -np.inf
+
+    def update(self, values, t=None):
+        """
+        'values' in 'axes' order -> (S,) bool switch states (do not modify).
+        A NaN value (axis not measured) counts as released.
+        't' is the frame time in seconds (capture, trace or video time); holds
+        are measured on it. Defaults to now, which ties holds to processing speed.
+        """
+        if t is None:
+            t = time.perf_counter()
+        x = np.asarray(values, dtype=np.float64)[self.axis] * self.sign
+        want = np.where(self.state, x > self.off, x > self.on)
+        flip = (want != self.state) & (t - self.since >= self.hold)
+        # A switch turning on beats the hold of its opposite number
+        turned_on = flip & want
+        if turned_on.any():
+            flip |= self.rivals[turned_on].any(axis=0) & self.state
+        self.state ^= flip
+        self.since[flip] = t
+        self.changed = flip
+        return self.state
+
+    def __getitem__(self, name):
+        return bool(self.state[self.index[name]])
@@ -0,0 +1,145 @@
+import time
+import heapq
+import threading
+from collections import deque
+
+# ==============================================================================
+#   EDGE-TRIGGERED INPUT STATE
+#   Shared by TITAN_ENGINE_FINAL.PY, contoller.py and controllerposture.py.
+#
+#   The engines say what SHOULD be held every frame; InputState remembers what
+#   the OS was last sent and only emits the difference. Holding 'w' for 1000
+#   frames sends one key-down, not 1000. Everything that is down can be released
+#   in one call (mode switch, menu, quit), so no cleanup lists are needed.
+#
+#   Devices are (press, release) callables, e.g.
+#     InputState(key=(keyboard.press, keyboard.release), mouse=(mouse.press, mouse.release))
+#
+#   With an ActuationWorker attached, the OS calls run on the worker thread and
+#   the frame loop never waits on input I/O (a 50 ms tap is scheduled, not slept).
+# ==============================================================================
+
+class ActuationWorker:
+    """
+    Emits input events from its own thread, in time order.
+    Events sit in a heap of (due, seq, fn, args, origin); seq keeps same-time
+    events FIFO. 'latencies' holds the last N (emit - due) delays in ns, i.e.
+    enqueue -> emit for immediate events, and lateness past the scheduled time
+    for delayed ones.
+    Set 'origin' to the capture time (perf_counter_ns) of the frame the caller
+    is deciding on: 'ages' then holds emit - origin of its immediate events,
+    i.e. how old the camera frame was when the OS actually got the input.
+    'trace', if set, is called as trace(name, start_ns, end_ns) for every emit.
+    """
+    def __init__(self, history=512):
+        self.events = []
+        self.seq = 0
+        self.cond = threading.Condition()
+        self.latencies = deque(maxlen=history)
+        self.ages = deque(maxlen=history)
+        self.origin = None
+        self.trace = None
+        self.emitted = 0
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, daemon=True, name="input")
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def schedule(self, fn, args, delay=0.0):
+        due = time.perf_counter_ns() + int(delay * 1e9)
+        with self.cond:
+            origin = self.origin if delay == 0 else None
+            heapq.heappush(self.events, (due, self.seq, fn, args, origin))
+            self.seq += 1
+            self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.stopped:
+                    wait = (self.events[0][0] - time.perf_counter_ns()) / 1e9 if self.events else None
+                    if wait is not None and wait <= 0:
+                        break
+                    self.cond.wait(wait)
+                if not self.events:
+                    return
+                # On stop, everything still queued goes out immediately (releases must not be lost)
+                due, _, fn, args, origin = heapq.heappop(self.events)
+            start = time.perf_counter_ns()
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f">>> INPUT ERROR {args}: {e}")
+            now = time.perf_counter_ns()
+            if self.trace:
+                self.trace(f"emit {getattr(fn, '__name__', 'input')}{args}", start, now)
+            self.latencies.append(now - due)
+            if origin is not None:
+                self.ages.append(now - origin)
+            self.emitted += 1
+
+    def latency_ms(self, q=95):
+        """Percentile of recent enqueue -> emit latency in ms (0 before any event)."""
+        lat = sorted(self.latencies.copy())
+        if not lat:
+            return 0.0
+        return lat[min(len(lat) - 1, int(len(lat) * q / 100))] / 1e6
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+        self.thread.join(timeout=1.0)
+
+class InputState:
+    def __init__(self, worker=None, **devices):
+        self.devices = devices
+        self.worker = worker
+        self.down = set()   # (device, key) pairs the OS currently has pressed (or queued to be)
+
+    def _emit(self, device, action, key, delay=0.0):
+        # action 0 = press, 1 = release
+        self.call(self.devices[device][action], key, delay=delay)
+
+    def call(self, fn, *args, delay=0.0):
+        """Any other input call (e.g. a relative mouse move), through the worker if attached."""
+        if self.worker is not None:
+            self.worker.schedule(fn, args, delay)
+        else:
+            if delay:
+                time.sleep(delay)
+            fn(*args)
+
+    def press(self, key, device="key"):
+        """Hold 'key'. Returns True if a key-down was actually sent."""
+        if (device, key) in self.down:
+            return False
+        self._emit(device, 0, key)
+        self.down.add((device, key))
+        return True
+
+    def release(self, key, device="key"):
+        """Let go of 'key'. Returns True if a key-up was actually sent."""
+        if (device, key) not in self.down:
+            return False
+        self._emit(device, 1, key)
+        self.down.discard((device, key))
+        return True
+
+    def set(self, key, held, device="key"):
+        return self.press(key, device) if held else self.release(key, device)
+
+    def tap(self, key, device="key", hold=0.0):
+        """One full press + release (e.g. a throttle notch). Not tracked as held."""
+        self.release(key, device)
+        self._emit(device, 0, key)
+        self._emit(device, 1, key, delay=hold)
+
+    def is_down(self, key, device="key"):
+        return (device, key) in self.down
+
+    def release_all(self):
+        for device, key in list(self.down):
+            self.release(key, device)
@@ -0,0 +1,59 @@
+import functools
+import cv2
+import numpy as np
+
+# ==============================================================================
+#   LABEL CACHE
+#   Shared by TITAN_ENGINE_FINAL.PY, contoller.py and controllerposture.py.
+#
+#   cv2.putText re-rasterizes the Hershey strokes on every call. Static labels
+#   ("VZ: OFF [0]", panel titles, instruction lines ...) are rasterized ONCE per
+#   (text, font, scale, color, thickness) into a small alpha sprite; drawing it
+#   again is one multiply + add over the text's bounding box.
+#   Least recently used sprites are evicted past LABEL_CACHE_SIZE.
+#   Output matches cv2.putText to within +-2 per channel (rounding).
+# ==============================================================================
+
+LABEL_CACHE_SIZE = 512
+
+@functools.lru_cache(maxsize=LABEL_CACHE_SIZE)
+def label_sprite(text, font, scale, color, thickness):
+    """
+    -> (color, trans, ox, oy): premultiplied color and transparency (x255) of
+    the text's bounding box, and the box's top-left offset from the putText
+    origin (bottom-left of the text). None for text that draws nothing.
+    """
+    (tw, th), base = cv2.getTextSize(text, font, scale, thickness)
+    pad = 2 * thickness + int(8 * scale) + 2   # Strokes can overshoot getTextSize
+    # Same putText call on a black and a white canvas: black gives the
+    # premultiplied color, white - black the transparency (text may be antialiased)
+    shape = (th + base + 2 * pad, tw + 2 * pad, 3)
+    black, white = np.zeros(shape, dtype=np.uint8), np.full(shape, 255, dtype=np.uint8)
+    for canvas in (black, white):
+        cv2.putText(canvas, text, (pad, pad + th), font, scale, color, thickness)
+    trans = cv2.subtract(white, black)
+    ys, xs = np.nonzero(((trans != 255) | (black != 0)).any(axis=2))
+    if not len(ys):
+        return None
+    y0, y1, x0, x1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+    return black[y0:y1, x0:x1].copy(), trans[y0:y1, x0:x1].copy(), x0 - pad, y0 - (pad + th)
+
+def draw_label(img, text, org, font, scale, color, thickness=1):
+    """
+    Drop-in for cv2.putText(img, text, org, font, scale, color, thickness)
+    for labels that repeat frame after frame.
+    """
+    sprite = label_sprite(text, font, scale, tuple(color), thickness)
+    if sprite is None:
+        return
+    premult, trans, ox, oy = sprite
+    x, y = org[0] + ox, org[1] + oy
+    sh, sw = trans.shape[:2]
+    # Clip to the image
+    cx0, cy0 = max(0, -x), max(0, -y)
+    cx1, cy1 = min(sw, img.shape[1] - x), min(sh, img.shape[0] - y)
+    if cx1 <= cx0 or cy1 <= cy0:
+        return
+    roi = img[y + cy0:y + cy1, x + cx0:x + cx1]
+    cv2.multiply(roi, trans[cy0:cy1, cx0:cx1], dst=roi, scale=1 / 255)
+    cv2.add(roi, premult[cy0:cy1, cx0:cx1], dst=roi)
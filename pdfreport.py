@@ -0,0 +1,215 @@
+import sys
+import math
+import numpy as np
+from datetime import datetime
+from fpdf import FPDF
+from reports import load_vz_session, format_vz_record, RunningHistogram
+
+# ==============================================================================
+#   VISION Z PDF EXPORT
+#   Runs as its own process (started by reports.ReportJob):
+#     python pdfreport.py SESSION.vzlog OUT.pdf
+#   Streams the session records in blocks, prints the number of rows written
+#   so far (one line per block) and starts a new page, with the table header,
+#   whenever a page fills up. Summary pages (event rates, per-frame
+#   statistics) come first.
+# ==============================================================================
+
+COL_WIDTHS = [25, 45, 40, 55, 25]
+HEADERS = ["TIME", "EVENT", "DATA", "MISTAKE", "GAIN"]
+ROW_H = 8
+BLOCK = 1000        # Records read (and progress lines printed) at a time
+
+class VisionZPDF(FPDF):
+    """FPDF with the table header repeated on every page and a page counter."""
+    def __init__(self, engine_name):
+        super().__init__()
+        self.engine_name = engine_name
+        self.table = False      # Event table header on new pages (off for the summary)
+        self.alias_nb_pages()
+        self.set_auto_page_break(True, margin=15)
+
+    def header(self):
+        if self.page_no() == 1:
+            # --- PDF Design: Header ---
+            self.set_fill_color(10, 10, 30)
+            self.set_text_color(0, 255, 100)
+            self.set_font("Arial", 'B', 24)
+            self.cell(190, 20, f"VISION Z: {self.engine_name} ANALYTICS", ln=True, align='C', fill=True)
+
+            # --- PDF Design: Subheader ---
+            self.set_font("Arial", '', 10)
+            self.set_text_color(100, 100, 100)
+            self.cell(190, 10, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ln=True, align='C')
+            self.ln(10)
+
+        if not self.table:
+            return
+
+        # --- PDF Design: Table Headers (every table page) ---
+        self.set_font("Arial", 'B', 11)
+        self.set_fill_color(50, 50, 50)
+        self.set_text_color(255, 255, 255)
+        for w, h in zip(COL_WIDTHS, HEADERS):
+            self.cell(w, 10, h, 1, 0, 'C', True)
+        self.ln()
+        # FPDF restores the row font/colors after header() and footer()
+
+    def footer(self):
+        self.set_y(-12)
+        self.set_font("Arial", '', 8)
+        self.set_text_color(120, 120, 120)
+        self.cell(0, 8, f"Page {self.page_no()}/{{nb}}", 0, 0, 'C')
+
+    def fit_cell(self, w, text):
+        """A bordered cell; text too wide for it is shrunk, then ellipsized, never cut blindly."""
+        width = self.get_string_width(text)
+        if width <= w - 2:
+            self.cell(w, ROW_H, text, 1)
+            return
+        # String width scales with font size: one step down to the size that fits (min 6pt)
+        self.set_font_size(max(6, int(10 * (w - 2) / width)))
+        if self.get_string_width(text) > w - 2:
+            while text and self.get_string_width(text + "...") > w - 2:
+                text = text[:-1]
+            text += "..."
+        self.cell(w, ROW_H, text, 1)
+        self.set_font_size(10)
+
+    def ensure_space(self, h):
+        if self.get_y() + h > self.page_break_trigger:
+            self.add_page()
+
+    def section(self, title):
+        self.ensure_space(20)
+        self.set_font("Arial", 'B', 14)
+        self.set_text_color(0, 120, 60)
+        self.cell(190, 10, title, ln=True)
+
+    def grid(self, widths, headers, rows):
+        """Small summary table: dark header row, then plain rows."""
+        self.set_font("Arial", 'B', 9)
+        self.set_fill_color(50, 50, 50)
+        self.set_text_color(255, 255, 255)
+        for w, h in zip(widths, headers):
+            self.cell(w, 7, h, 1, 0, 'C', True)
+        self.ln()
+        self.set_font("Arial", '', 9)
+        self.set_text_color(0, 0, 0)
+        for row in rows:
+            self.ensure_space(7)
+            for i, (w, item) in enumerate(zip(widths, row)):
+                self.cell(w, 7, str(item), 1, 0, 'L' if i == 0 else 'R')
+            self.ln()
+        self.ln(4)
+
+    def bar_chart(self, x, y, w, h, counts, title, lo_label, hi_label):
+        """Bars of 'counts' in a w x h mm box, with the value range under it."""
+        self.set_font("Arial", 'B', 9)
+        self.set_text_color(0, 0, 0)
+        self.text(x, y - 1.5, title)
+        self.set_draw_color(150, 150, 150)
+        self.rect(x, y, w, h)
+        peak = max(max(counts), 1)
+        bw = w / len(counts)
+        self.set_fill_color(0, 160, 90)
+        for i, c in enumerate(counts):
+            if c:
+                bh = (h - 1) * c / peak
+                self.rect(x + i * bw, y + h - bh, bw, bh, 'F')
+        self.set_draw_color(0, 0, 0)
+        self.set_font("Arial", '', 7)
+        self.text(x, y + h + 3.5, lo_label)
+        self.text(x + w - self.get_string_width(hi_label), y + h + 3.5, hi_label)
+
+def fmt_stat(x):
+    return "-" if x != x or math.isinf(x) else f"{x:.3g}" if abs(x) < 1 else f"{x:.1f}"
+
+def write_summary(pdf, records, meta):
+    """Summary pages: event counts/rates, events over time, per-metric statistics + histograms."""
+    events = meta["events"]
+    duration = meta.get("duration") or (float(records["t"][-1]) if len(records) else 0.0)
+    minutes = max(duration / 60, 1e-9)
+
+    # Event counts and the event rate over time, one block of records at a time
+    per_code = np.zeros(len(events), dtype=np.int64)
+    over_time = np.zeros(60, dtype=np.int64)
+    for start in range(0, len(records), BLOCK):
+        block = records[start:start + BLOCK]
+        per_code += np.bincount(block["code"], minlength=len(events))[:len(events)]
+        over_time += np.histogram(block["t"], bins=60, range=(0, max(duration, 1e-9)))[0]
+
+    pdf.section(f"SESSION SUMMARY   ({int(duration // 60):02}:{duration % 60:05.2f}, {len(records)} events)")
+    names = {}
+    for code, (event, data, _, _) in enumerate(events):
+        label = event if "{" in data else f"{event} ({data})"
+        names[label] = names.get(label, 0) + per_code[code]
+    rows = [(label, n, f"{n / minutes:.1f}") for label, n in names.items() if n]
+    if rows:
+        pdf.grid([100, 45, 45], ["EVENT", "COUNT", "PER MIN"], rows)
+        pdf.ensure_space(45)
+        y = pdf.get_y() + 5
+        pdf.bar_chart(10, y, 190, 30, over_time.tolist(), "EVENTS OVER TIME", "00:00",
+                      f"{int(duration // 60):02}:{duration % 60:05.2f}")
+        pdf.set_y(y + 38)
+
+    hists = {name: RunningHistogram.from_dict(d) for name, d in meta.get("stats", {}).items()}
+    hists = {name: h for name, h in hists.items() if h.n}
+    if not hists:
+        return
+    pdf.section("PER-FRAME STATISTICS")
+    pdf.grid([46, 18, 18, 18, 18, 18, 18, 18, 18],
+             ["METRIC", "N", "MEAN", "STD", "P50", "P95", "P99", "MIN", "MAX"],
+             [(f"{name} [{h.unit}]" if h.unit else name, h.n,
+               *(fmt_stat(v) for v in (h.mean, h.std, h.quantile(50), h.quantile(95), h.quantile(99), h.min, h.max)))
+              for name, h in hists.items()])
+
+    # Histograms, two per row (under/overflow bins folded into the edge bars)
+    for i, (name, h) in enumerate(hists.items()):
+        if i % 2 == 0:
+            pdf.ensure_space(50)
+            y = pdf.get_y() + 6
+        counts = h.counts[1:-1].copy()
+        counts[0] += h.counts[0]
+        counts[-1] += h.counts[-1]
+        pdf.bar_chart(10 + (i % 2) * 100, y, 90, 32, counts.tolist(), name,
+                      f"{fmt_stat(h.lo)} {h.unit}", f"{fmt_stat(h.hi)} {h.unit}")
+        if i % 2 == 1 or i == len(hists) - 1:
+            pdf.set_y(y + 42)
+
+def write_pdf_report(session_path, out_path, progress=None):
+    """
+    Streams every record of a session into a paginated PDF: summary page(s)
+    first, then the full event table.
+    'progress' is called with the number of rows written after every block.
+    """
+    records, meta = load_vz_session(session_path)
+    events = meta["events"]
+    pdf = VisionZPDF(meta["engine"])
+    pdf.add_page()
+    write_summary(pdf, records, meta)
+    pdf.table = True
+    pdf.add_page()
+
+    # --- PDF Design: Data Population ---
+    pdf.set_font("Arial", '', 10)
+    pdf.set_text_color(0, 0, 0)
+    for start in range(0, len(records), BLOCK):
+        for rec in records[start:start + BLOCK]:
+            for w, item in zip(COL_WIDTHS, format_vz_record(rec, events)):
+                pdf.fit_cell(w, str(item))
+            pdf.ln()
+        if progress:
+            progress(min(start + BLOCK, len(records)))
+
+    pdf.output(out_path)
+    return out_path
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python pdfreport.py SESSION.vzlog OUT.pdf")
+    try:
+        write_pdf_report(sys.argv[1], sys.argv[2], progress=lambda n: print(n, flush=True))
+    except Exception as e:
+        print(f"Error generating PDF: {e}", file=sys.stderr)
+        sys.exit(1)
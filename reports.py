@@ -0,0 +1,181 @@
+import os
+import sys
+import json
+import math
+import threading
+import subprocess
+import numpy as np
+
+# ==============================================================================
+#   VISION Z REPORTS
+#   Session log format + statistics, used by TITAN_ENGINE_FINAL.PY.
+#
+#   A session is vz_sessions/<name>.vzlog (raw VZ_DTYPE records, append-only)
+#   plus <name>.vzlog.json (engine, start time, record count, event table).
+#
+#   SessionStats keeps O(1)-per-frame running statistics (fixed-bin histograms
+#   + mean/std/min/max) of per-frame values such as steer angle or gesture
+#   dwell. They are saved in the sidecar and rendered as summary pages.
+#
+#   The PDF itself is written by pdfreport.py in a separate process; ReportJob
+#   runs it in the background and tracks progress, so the game never waits on
+#   FPDF (and never even imports it).
+# ==============================================================================
+
+# One record per event: time since VZ start, interned event code, numeric payload.
+VZ_DTYPE = np.dtype([("t", "<f8"), ("code", "<u2"), ("value", "<f4")])
+
+def load_vz_session(path):
+    """
+    -> (records, meta): the whole session as an np.memmap of VZ_DTYPE, plus
+    the sidecar metadata (engine, start time, code table).
+    """
+    with open(path + ".json") as f:
+        meta = json.load(f)
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=VZ_DTYPE), meta
+    return np.memmap(path, dtype=VZ_DTYPE, mode="r"), meta
+
+def format_vz_record(rec, events):
+    """Record -> [TIME, EVENT, DATA, REMEDY, GAIN] strings."""
+    event, data, fix, gain = events[int(rec["code"])]
+    elapsed = float(rec["t"])
+    ts = f"{int(elapsed//60):02}:{elapsed%60:05.2f}"
+    if "{" in data:
+        data = data.format(float(rec["value"]))
+    return [ts, event, data, fix, gain]
+
+# ==============================================================================
+#   SESSION STATISTICS
+# ==============================================================================
+
+class RunningHistogram:
+    """
+    Fixed-bin histogram over [lo, hi) plus running count/mean/std/min/max.
+    Values outside the range land in an under/overflow bin (counts[0] / [-1]).
+    add() is O(1); percentiles are interpolated inside the bin.
+    """
+    def __init__(self, lo, hi, bins, unit=""):
+        self.lo, self.hi, self.bins, self.unit = lo, hi, bins, unit
+        self.width = (hi - lo) / bins
+        self.counts = np.zeros(bins + 2, dtype=np.int64)
+        self.n = 0
+        self.mean = self.m2 = 0.0
+        self.min, self.max = math.inf, -math.inf
+
+    def add(self, x):
+        if x != x:  # NaN
+            return
+        i = int((x - self.lo) / self.width) + 1 if x >= self.lo else 0
+        self.counts[min(i, self.bins + 1)] += 1
+        # Welford's running mean / variance
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+        if x < self.min: self.min = x
+        if x > self.max: self.max = x
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / self.n) if self.n else math.nan
+
+    def quantile(self, q):
+        """q in percent (e.g. 95), accurate to one bin width."""
+        if not self.n:
+            return math.nan
+        target = q / 100 * self.n
+        cum = np.cumsum(self.counts)
+        i = int(np.searchsorted(cum, target))
+        if i == 0:
+            return self.min
+        if i > self.bins:
+            return self.max
+        frac = (target - cum[i - 1]) / self.counts[i]
+        return float(min(max(self.lo + (i - 1 + frac) * self.width, self.min), self.max))
+
+    def to_dict(self):
+        return {"lo": self.lo, "hi": self.hi, "bins": self.bins, "unit": self.unit,
+                "counts": self.counts.tolist(), "n": self.n, "mean": self.mean,
+                "m2": self.m2, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, d):
+        h = cls(d["lo"], d["hi"], d["bins"], d["unit"])
+        h.counts[:] = d["counts"]
+        h.n, h.mean, h.m2, h.min, h.max = d["n"], d["mean"], d["m2"], d["min"], d["max"]
+        return h
+
+class SessionStats:
+    """
+    Running histograms of one Vision Z session.
+    'metrics' is a table name -> (lo, hi, bins, unit). Gesture dwell times get
+    a '<GESTURE> dwell' histogram (DWELL spec) the first time one ends.
+    """
+    DWELL = (0.0, 5.0, 50, "s")
+
+    def __init__(self, metrics):
+        self.hists = {name: RunningHistogram(*spec) for name, spec in metrics.items()}
+        self.gesture_held = {}    # GestureEngine -> (max_hands, G) 'held' of the last frame
+
+    def add(self, name, x):
+        self.hists[name].add(x)
+
+    def add_dwell(self, engine, held):
+        """
+        'held' is GestureEngine.evaluate()'s (n, G) seconds-matched array.
+        A gesture's dwell is recorded on the frame its hand slot stops matching.
+        """
+        prev = self.gesture_held.get(engine)
+        if prev is None:
+            prev = self.gesture_held[engine] = np.full((engine.max_hands, len(engine.names)), np.nan)
+        cur = np.full_like(prev, np.nan)
+        cur[:len(held)] = held[:len(prev)]
+        for slot, g in zip(*np.nonzero(~np.isnan(prev) & np.isnan(cur))):
+            name = f"{engine.names[g]} dwell"
+            if name not in self.hists:
+                self.hists[name] = RunningHistogram(*self.DWELL)
+            self.hists[name].add(float(prev[slot, g]))
+        prev[:] = cur
+
+    def to_dict(self):
+        return {name: h.to_dict() for name, h in self.hists.items()}
+
+class ReportJob:
+    """
+    One background PDF export (a 'python pdfreport.py' child process).
+    'rows' / 'total' is the real progress, read from the child's output.
+    'on_done(job)' runs on the job's reader thread once the child exits.
+    """
+    def __init__(self, session_path, out_path, on_done=None):
+        with open(session_path + ".json") as f:
+            self.total = json.load(f)["count"]
+        self.out_path = out_path
+        self.rows = 0
+        self.ok = None      # None while running, then True / False
+        self.on_done = on_done
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdfreport.py"),
+             session_path, out_path],
+            stdout=subprocess.PIPE, text=True)
+        self.thread = threading.Thread(target=self.read_progress, daemon=True)
+        self.thread.start()
+
+    def read_progress(self):
+        for line in self.process.stdout:
+            if line.strip().isdigit():
+                self.rows = int(line)
+        self.ok = self.process.wait() == 0
+        if self.on_done:
+            self.on_done(self)
+
+    @property
+    def running(self):
+        return self.ok is None
+
+    @property
+    def fraction(self):
+        return self.rows / self.total if self.total else 1.0
+
+    def wait(self):
+        self.thread.join()